@@ -15,22 +15,106 @@ Created by Phyo Theingi, 1 October 2025
 
 import numpy as np          # For math operations and arrays
 import random              # For random choices
+import multiprocessing     # For independent ACO runs in parallel
 from dataclasses import dataclass  # For easy data structures
 from typing import List, Dict      # Type hints
 
+try:
+    from numba import njit, prange # Optional JIT for the ant movement hot path
+except ImportError:
+    njit = None
+    prange = range
+
 @dataclass
 class Ant:
     """Ant agent for ACO-based attack detection."""
     current_node: int              # Which node the ant is currently at
-    visited_nodes: List[int] = None    # List of nodes this ant has visited
+    max_steps: int = 100           # Size of the preallocated trail buffer
+    visited: np.ndarray = None     # Trail buffer of visited nodes, filled up to vlen
+    vlen: int = 0                  # Number of nodes recorded in the trail
+    recent: tuple = (-1, -1, -1)   # Last three nodes of the trail, oldest first
     suspicious_nodes: List[int] = None # List of nodes this ant thinks are suspicious
     
     def __post_init__(self):
-        # Initialize empty lists if they're None
-        if self.visited_nodes is None:
-            self.visited_nodes = []
+        # Allocate the trail once and initialize empty lists if they're None
+        if self.visited is None:
+            self.visited = np.empty(self.max_steps, dtype=np.int32)
         if self.suspicious_nodes is None:
             self.suspicious_nodes = []
+    
+    @property
+    def visited_nodes(self):
+        return self.visited[:self.vlen]
+
+def _move_ant(cur, visited, vlen, pheromone, heuristic_weight, suspicious_mask,
+              indptr, indices, alpha, roll):
+    """Record one ant step; return the next node and whether cur looks suspicious.
+    
+    roll is a uniform [0, 1) draw made by the caller from the seeded np.random,
+    since Numba's own generator ignores np.random.seed.
+    """
+    visited[vlen] = cur
+    vlen += 1
+    suspicious = suspicious_mask[cur]
+    
+    # Unnormalized weights for neighbors outside the last 3 visited nodes
+    start, stop = indptr[cur], indptr[cur + 1]
+    weights = np.zeros(stop - start)
+    total = 0.0
+    for k in range(start, stop):
+        next_node = indices[k]
+        is_recent = False
+        for j in range(max(0, vlen - 3), vlen):
+            if visited[j] == next_node:
+                is_recent = True
+                break
+        if is_recent:
+            continue
+        # alpha = 1.0 in the paper; skip pow() in that case
+        pheromone_weight = pheromone[k] if alpha == 1.0 else pheromone[k] ** alpha
+        weights[k - start] = pheromone_weight * heuristic_weight[next_node]
+        total += weights[k - start]
+    
+    if total <= 0:
+        return cur, suspicious
+    
+    # Roulette wheel on the cumulative weights
+    threshold = roll * total
+    cumulative = 0.0
+    chosen = cur
+    for k in range(start, stop):
+        if weights[k - start] > 0:
+            chosen = indices[k]
+            cumulative += weights[k - start]
+            if cumulative >= threshold:
+                break
+    return chosen, suspicious
+
+def _move_colony(current, trails, step, pheromone, heuristic_weight, suspicious_mask,
+                 indptr, indices, alpha, rolls, flagged):
+    """Move every ant one step; ants only read shared state, so they run in parallel."""
+    for a in prange(current.shape[0]):
+        next_node, suspicious = _move_ant(current[a], trails[a], step, pheromone,
+                                          heuristic_weight, suspicious_mask,
+                                          indptr, indices, alpha, rolls[a])
+        current[a] = next_node
+        flagged[a] = suspicious
+
+if njit is not None:
+    _move_ant = njit(cache=True)(_move_ant)
+    _move_colony = njit(parallel=True, cache=True)(_move_colony)
+
+def _run_aco_worker(args):
+    """Run one independent ACO pass in a worker process.
+    
+    The seed drives the start nodes and, through np.random, every move roll.
+    """
+    network, num_ants, params, iterations, seed = args
+    random.seed(seed)
+    np.random.seed(seed)
+    aco = ACOAlgorithm(network, num_ants=num_ants)
+    aco.alpha, aco.beta, aco.rho, aco.Q = params
+    return aco.run_aco(iterations)
 
 class ACOAlgorithm:
     """Ant Colony Optimization algorithm for sinkhole attack detection."""
@@ -39,7 +123,11 @@ class ACOAlgorithm:
         self.network = network
         self.num_ants = num_ants
         self.ants = []
-        self.pheromone_matrix = np.ones((network.num_nodes, network.num_nodes)) * 0.5
+        # Pheromone per directed edge, aligned with the network's CSR neighbor slots;
+        # float32 is ample precision and halves the memory traffic of evaporation
+        self.pheromone_values = np.full(len(network.nbr_indices), 0.5, dtype=np.float32)
+        # Pheromone an ant leaves on a node while stuck there (the dense matrix diagonal)
+        self.self_pheromone = np.full(network.num_nodes, 0.5, dtype=np.float32)
         self.detected_attacks = []
         
         # ACO parameters from research paper
@@ -48,118 +136,170 @@ class ACOAlgorithm:
         self.rho = 0.1    # evaporation rate
         self.Q = 100      # pheromone deposit constant
         
-    def create_ant_colony(self):
+        # Per-node values that stay fixed for a whole run, filled by run_aco
+        self.delivery_ratio = None
+        self.heuristic_weight = None
+        self.suspicious_mask = None
+        
+        self.use_numba = njit is not None
+        
+    def create_ant_colony(self, max_steps=100):
         self.ants = []
-        for _ in range(self.num_ants):
+        # One trail row per ant so the whole colony can be moved in a single kernel call
+        self.trails = np.empty((self.num_ants, max_steps), dtype=np.int32)
+        for a in range(self.num_ants):
             start_node = random.randint(0, self.network.num_nodes - 1)
-            self.ants.append(Ant(current_node=start_node))
+            self.ants.append(Ant(current_node=start_node, max_steps=max_steps,
+                                 visited=self.trails[a]))
     
-    def ant_movement(self, ant):
-        current_node = ant.current_node
-        ant.visited_nodes.append(current_node)
-        
-        node_behavior = self.network.get_node_behavior(current_node)
-        delivery_ratio = node_behavior['delivery_ratio']
-        packets_sent = node_behavior['packets_sent']
+    def precompute_heuristics(self):
+        """Cache per-node heuristics; traffic counters do not change during ACO."""
+        self.delivery_ratio = self.network.get_delivery_ratios()
+        # heuristic = 1 / (distance + 0.1) with unit distance, doubled for low delivery;
+        # raised to beta here so the move step never calls pow() on it
+        base_weight = (1.0 / 1.1) ** self.beta
+        self.heuristic_weight = np.where(self.delivery_ratio < 0.4,
+                                         base_weight * 2.0 ** self.beta, base_weight)
         
         # Calculate suspiciousness using heuristics
-        suspiciousness_score = 0
+        network = self.network
+        suspiciousness_score = np.zeros(network.num_nodes)
+        suspiciousness_score += 0.4 * (self.delivery_ratio < 0.38)
+        suspiciousness_score += 0.3 * ((network.packets_sent > 35) & (self.delivery_ratio < 0.28))
+        suspiciousness_score += 0.2 * (network.energy < 40)
+        suspiciousness_score += 0.1 * (network.degree > 6)
+        self.suspicious_mask = suspiciousness_score > 0.7
+    
+    def ant_movement(self, ant):
+        network = self.network
+        current_node = ant.current_node
         
-        if delivery_ratio < 0.38:
-            suspiciousness_score += 0.4
+        # Numba does not bounds-check, so a full trail must be caught here
+        if ant.vlen >= len(ant.visited):
+            raise IndexError(f"Ant trail buffer is full ({len(ant.visited)} steps)")
         
-        if packets_sent > 35 and delivery_ratio < 0.28:
-            suspiciousness_score += 0.3
+        if self.use_numba:
+            next_node, suspicious = _move_ant(
+                current_node, ant.visited, ant.vlen, self.pheromone_values,
+                self.heuristic_weight, self.suspicious_mask,
+                network.nbr_indptr, network.nbr_indices, self.alpha, np.random.random())
+            ant.vlen += 1
+            ant.recent = (ant.recent[1], ant.recent[2], current_node)
+            if suspicious:
+                ant.suspicious_nodes.append(current_node)
+            ant.current_node = int(next_node)
+            return
         
-        if hasattr(self.network.nodes[current_node], 'energy'):
-            energy = self.network.nodes[current_node].energy
-            if energy < 40:
-                suspiciousness_score += 0.2
-                
-        current_node_obj = self.network.nodes[current_node]
-        if len(current_node_obj.neighbors) > 6:
-            suspiciousness_score += 0.1
+        ant.visited[ant.vlen] = current_node
+        ant.vlen += 1
+        ant.recent = recent = (ant.recent[1], ant.recent[2], current_node)
         
-        if suspiciousness_score > 0.7:
+        if self.suspicious_mask[current_node]:
             ant.suspicious_nodes.append(current_node)
         
         # Select next node using ACO probability
-        current_node_obj = self.network.nodes[current_node]
-        available_nodes = [n for n in current_node_obj.neighbors 
-                          if n not in ant.visited_nodes[-3:]]
-        
-        if available_nodes:
-            probabilities = []
-            for next_node in available_nodes:
-                pheromone = self.pheromone_matrix[current_node][next_node]
-                distance = 1.0
-                next_behavior = self.network.get_node_behavior(next_node)
-                heuristic = 1.0 / (distance + 0.1)
-                
-                if next_behavior['delivery_ratio'] < 0.4:
-                    heuristic *= 2.0
-                
-                probability = (pheromone ** self.alpha) * (heuristic ** self.beta)
-                probabilities.append(probability)
-            
-            if probabilities and sum(probabilities) > 0:
-                total_prob = sum(probabilities)
-                probabilities = [p/total_prob for p in probabilities]
-                next_node = np.random.choice(available_nodes, p=probabilities)
-                ant.current_node = next_node
+        start, stop = network.nbr_indptr[current_node], network.nbr_indptr[current_node + 1]
+        neighbors = network.nbr_indices[start:stop]
+        available = (neighbors != recent[0]) & (neighbors != recent[1]) & (neighbors != recent[2])
+        available_nodes = neighbors[available]
+        
+        if len(available_nodes):
+            pheromones = self.pheromone_values[start:stop][available]
+            if self.alpha != 1.0:
+                pheromones = pheromones ** self.alpha
+            probabilities = pheromones * self.heuristic_weight[available_nodes]
+            cumulative = np.cumsum(probabilities)
+            total_prob = cumulative[-1]
+            if total_prob > 0:
+                # Roulette wheel on the unnormalized weights
+                threshold = random.random() * total_prob
+                ant.current_node = int(available_nodes[np.searchsorted(cumulative, threshold)])
+    
+    def colony_movement(self):
+        """Move all ants one step with the parallel Numba kernel."""
+        if not self.ants:
+            return
+        if any(ant.vlen >= self.trails.shape[1] for ant in self.ants):
+            raise IndexError(f"Ant trail buffer is full ({self.trails.shape[1]} steps)")
+        network = self.network
+        current = np.array([ant.current_node for ant in self.ants], dtype=np.int64)
+        rolls = np.random.random(len(self.ants))
+        flagged = np.zeros(len(self.ants), dtype=bool)
+        _move_colony(current, self.trails, self.ants[0].vlen, self.pheromone_values,
+                     self.heuristic_weight, self.suspicious_mask,
+                     network.nbr_indptr, network.nbr_indices, self.alpha, rolls, flagged)
+        
+        for ant, next_node, suspicious in zip(self.ants, current.tolist(), flagged.tolist()):
+            if suspicious:
+                ant.suspicious_nodes.append(ant.current_node)
+            ant.vlen += 1
+            ant.recent = (ant.recent[1], ant.recent[2], ant.current_node)
+            ant.current_node = next_node
     
     def update_pheromones(self):
         # Evaporation
-        self.pheromone_matrix *= (1 - self.rho)
+        self.pheromone_values *= np.float32(1 - self.rho)
+        self.self_pheromone *= np.float32(1 - self.rho)
         
-        # Deposition
+        # Deposition, gathered across the colony and scattered in one pass
+        edge_slots, amounts = [], []
+        stuck_nodes, stuck_amounts = [], []
         for ant in self.ants:
             if ant.suspicious_nodes:
                 pheromone_amount = self.Q * len(ant.suspicious_nodes)
+                suspicious = np.asarray(ant.suspicious_nodes)
+                
+                visited = np.asarray(ant.visited_nodes)
+                is_suspicious = np.zeros(self.network.num_nodes, dtype=bool)
+                is_suspicious[suspicious] = True
+                into_suspicious = is_suspicious[visited[1:]]
+                moved = visited[1:] != visited[:-1]
+                hits = np.flatnonzero(into_suspicious & moved)
+                edge_slots.append(self.network.get_edge_slots(visited[hits], visited[hits + 1]))
+                amounts.append(np.full(len(hits), pheromone_amount, dtype=np.float32))
+                
+                # Steps where a stuck ant stayed put are not edges; keep them per node
+                stuck = visited[1:][into_suspicious & ~moved]
+                stuck_nodes.append(stuck)
+                stuck_amounts.append(np.full(len(stuck), pheromone_amount, dtype=np.float32))
                 
-                for i in range(len(ant.visited_nodes) - 1):
-                    current = ant.visited_nodes[i]
-                    next_node = ant.visited_nodes[i + 1]
-                    if next_node in ant.suspicious_nodes:
-                        self.pheromone_matrix[current][next_node] += pheromone_amount
-                        
-                for suspicious_node in ant.suspicious_nodes:
-                    suspicious_obj = self.network.nodes[suspicious_node]
-                    for neighbor in suspicious_obj.neighbors:
-                        self.pheromone_matrix[suspicious_node][neighbor] += pheromone_amount * 0.5
+                # Spread to every neighbor of each suspicious node
+                slots = self.network.get_neighbor_slots(suspicious)
+                edge_slots.append(slots)
+                amounts.append(np.full(len(slots), pheromone_amount * 0.5, dtype=np.float32))
+        
+        if edge_slots:
+            np.add.at(self.pheromone_values, np.concatenate(edge_slots), np.concatenate(amounts))
+            np.add.at(self.self_pheromone, np.concatenate(stuck_nodes), np.concatenate(stuck_amounts))
     
     def detect_attacks(self):
         print("Detecting sinkhole attacks using ACO...")
         
         # Collect votes from all ants
-        all_suspicious = []
-        for ant in self.ants:
-            all_suspicious.extend(ant.suspicious_nodes)
+        network = self.network
+        all_suspicious = np.concatenate([np.asarray(ant.suspicious_nodes, dtype=np.int64)
+                                         for ant in self.ants] or [np.empty(0, dtype=np.int64)])
+        votes = np.bincount(all_suspicious, minlength=network.num_nodes)
+        vote_threshold = max(2, len(self.ants) // 5)
         
-        vote_count = {}
-        for node_id in all_suspicious:
-            vote_count[node_id] = vote_count.get(node_id, 0) + 1
+        # Strongest pheromone per node (outgoing edges or its own stuck-ant pheromone)
+        max_pheromone = self.self_pheromone.astype(float)
+        has_edges = network.degree > 0
+        if has_edges.any():
+            edge_max = np.maximum.reduceat(self.pheromone_values, network.nbr_indptr[:-1][has_edges])
+            max_pheromone[has_edges] = np.maximum(max_pheromone[has_edges], edge_max)
+        pheromone_threshold = 7.0
         
-        self.detected_attacks = []
+        packets_sent = network.packets_sent
+        packets_received = network.packets_received
+        behavior_score = ((network.get_delivery_ratios() < 0.4).astype(int)
+                          + (packets_sent > 30)
+                          + (packets_received < packets_sent * 0.3))
         
-        for node_id, votes in vote_count.items():
-            vote_threshold = max(2, len(self.ants) // 5)
-            max_pheromone = np.max(self.pheromone_matrix[node_id])
-            pheromone_threshold = 7.0
-            
-            node_behavior = self.network.get_node_behavior(node_id)
-            behavior_score = 0
-            if node_behavior['delivery_ratio'] < 0.4:
-                behavior_score += 1
-            if node_behavior['packets_sent'] > 30:
-                behavior_score += 1
-            if node_behavior['packets_received'] < node_behavior['packets_sent'] * 0.3:
-                behavior_score += 1
-                
-            if (votes >= vote_threshold and 
-                max_pheromone >= pheromone_threshold and 
-                behavior_score >= 2):
-                self.detected_attacks.append(node_id)
+        detected = ((votes >= vote_threshold) &
+                    (max_pheromone >= pheromone_threshold) &
+                    (behavior_score >= 2))
+        self.detected_attacks = np.flatnonzero(detected).tolist()
         
         return self.detected_attacks
     
@@ -168,11 +308,15 @@ class ACOAlgorithm:
         print(f"Parameters: {self.num_ants} ants, {iterations} iterations")
         print(f"Alpha={self.alpha}, Beta={self.beta}, Rho={self.rho}")
         
-        self.create_ant_colony()
+        self.create_ant_colony(max_steps=iterations)
+        self.precompute_heuristics()
         
         for iteration in range(iterations):
-            for ant in self.ants:
-                self.ant_movement(ant)
+            if self.use_numba:
+                self.colony_movement()
+            else:
+                for ant in self.ants:
+                    self.ant_movement(ant)
             
             self.update_pheromones()
             
@@ -184,3 +328,25 @@ class ACOAlgorithm:
         
         print(f"ACO completed: {len(detected)} attacks detected")
         return detected
+    
+    def run_aco_parallel(self, n_runs=5, iterations=100, processes=None):
+        """Run independent ACO passes across processes and keep majority-vote detections."""
+        print(f"Running {n_runs} independent ACO runs in parallel...")
+        
+        # Worker seeds come from the global RNG so a seeded caller gets repeatable runs
+        seeds = np.random.randint(0, 2**31 - 1, n_runs)
+        params = (self.alpha, self.beta, self.rho, self.Q)
+        jobs = [(self.network, self.num_ants, params, iterations, int(seed)) for seed in seeds]
+        
+        # Spawn fresh workers; forking after Numba has started its thread pool is unsafe
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            results = pool.map(_run_aco_worker, jobs)
+        
+        run_votes = np.zeros(self.network.num_nodes, dtype=np.int64)
+        for detected in results:
+            run_votes[np.asarray(detected, dtype=np.int64)] += 1
+        self.detected_attacks = np.flatnonzero(run_votes > n_runs / 2).tolist()
+        
+        print(f"Parallel ACO completed: {len(self.detected_attacks)} attacks detected "
+              f"by a majority of {n_runs} runs")
+        return self.detected_attacks
@@ -14,24 +14,42 @@ Created by Phyo Theingi, 1 October 2025
 
 import numpy as np
 import random
-from dataclasses import dataclass
-from typing import List, Dict
 
-@dataclass
 class SensorNode:
-    """Wireless sensor node in the network."""
-    node_id: int
-    x: float
-    y: float
-    is_malicious: bool = False
-    energy: float = 100.0
-    packets_sent: int = 0
-    packets_received: int = 0
-    neighbors: List[int] = None
-    
-    def __post_init__(self):
-        if self.neighbors is None:
-            self.neighbors = []
+    """Read-only view of one sensor node, backed by the network arrays."""
+    __slots__ = ('network', 'node_id')
+    
+    def __init__(self, network, node_id):
+        self.network = network
+        self.node_id = node_id
+    
+    @property
+    def x(self):
+        return float(self.network.x[self.node_id])
+    
+    @property
+    def y(self):
+        return float(self.network.y[self.node_id])
+    
+    @property
+    def is_malicious(self):
+        return bool(self.network.is_malicious[self.node_id])
+    
+    @property
+    def energy(self):
+        return float(self.network.energy[self.node_id])
+    
+    @property
+    def packets_sent(self):
+        return int(self.network.packets_sent[self.node_id])
+    
+    @property
+    def packets_received(self):
+        return int(self.network.packets_received[self.node_id])
+    
+    @property
+    def neighbors(self):
+        return self.network.get_neighbors(self.node_id).tolist()
 
 class WirelessSensorNetwork:
     """Manages the wireless sensor network and traffic simulation."""
@@ -39,7 +57,23 @@ class WirelessSensorNetwork:
     def __init__(self, num_nodes=100, network_size=(100, 100)):
         self.num_nodes = num_nodes
         self.network_size = network_size
-        self.nodes = {}
+        
+        # Node state stored as parallel arrays indexed by node id
+        self.x = np.zeros(num_nodes)
+        self.y = np.zeros(num_nodes)
+        self.energy = np.zeros(num_nodes)
+        self.packets_sent = np.zeros(num_nodes, dtype=np.int64)
+        self.packets_received = np.zeros(num_nodes, dtype=np.int64)
+        self.is_malicious = np.zeros(num_nodes, dtype=bool)
+        
+        # Connectivity as dense adjacency plus CSR neighbor lists
+        self.adjacency = None
+        self.nbr_indptr = None
+        self.nbr_indices = None
+        self.degree = None
+        self._edge_keys = None
+        
+        self.nodes = {i: SensorNode(self, i) for i in range(num_nodes)}
         self.sinkhole_nodes = []
         self.total_packets_sent = 0
         self.total_packets_received = 0
@@ -51,39 +85,35 @@ class WirelessSensorNetwork:
         """Create a wireless sensor network with random node placement."""
         print("Creating Wireless Sensor Network...")
         
-        for i in range(self.num_nodes):
-            x = random.uniform(0, self.network_size[0])
-            y = random.uniform(0, self.network_size[1])
-            
-            self.nodes[i] = SensorNode(
-                node_id=i,
-                x=x,
-                y=y,
-                energy=random.uniform(80, 100)
-            )
+        self.x[:] = np.random.uniform(0, self.network_size[0], self.num_nodes)
+        self.y[:] = np.random.uniform(0, self.network_size[1], self.num_nodes)
+        self.energy[:] = np.random.uniform(80, 100, self.num_nodes)
         
+        # Pairwise squared distances via broadcasting; compare against range^2 to skip sqrt
         communication_range = 20
-        for i in range(self.num_nodes):
-            for j in range(i+1, self.num_nodes):
-                distance = np.sqrt((self.nodes[i].x - self.nodes[j].x)**2 + 
-                                 (self.nodes[i].y - self.nodes[j].y)**2)
-                if distance <= communication_range:
-                    self.nodes[i].neighbors.append(j)
-                    self.nodes[j].neighbors.append(i)
+        xy = np.column_stack((self.x, self.y))
+        d2 = ((xy[:, None, :] - xy[None, :, :]) ** 2).sum(-1)
+        self.adjacency = (d2 <= communication_range ** 2) & ~np.eye(self.num_nodes, dtype=bool)
+        
+        # Row-major nonzeros are already grouped by source node, sorted by neighbor id
+        self.degree = self.adjacency.sum(axis=1)
+        self.nbr_indptr = np.concatenate(([0], np.cumsum(self.degree)))
+        rows, self.nbr_indices = np.nonzero(self.adjacency)
+        self._edge_keys = rows * self.num_nodes + self.nbr_indices
         
         print(f"Network created with {self.num_nodes} nodes")
-        print(f"Average neighbors per node: {np.mean([len(n.neighbors) for n in self.nodes.values()]):.1f}")
+        print(f"Average neighbors per node: {np.mean(self.degree):.1f}")
     
     def _inject_sinkhole_attacks(self):
         """Inject sinkhole attacks into the network (5-10% of nodes)."""
         num_attacks = random.randint(5, 10)
         self.sinkhole_nodes = random.sample(range(self.num_nodes), num_attacks)
         
-        for node_id in self.sinkhole_nodes:
-            self.nodes[node_id].is_malicious = True
-            self.nodes[node_id].packets_sent = random.randint(80, 120)
-            self.nodes[node_id].packets_received = random.randint(5, 25)
-            self.nodes[node_id].energy = random.uniform(20, 40)
+        ids = np.array(self.sinkhole_nodes)
+        self.is_malicious[ids] = True
+        self.packets_sent[ids] = np.random.randint(80, 121, num_attacks)
+        self.packets_received[ids] = np.random.randint(5, 26, num_attacks)
+        self.energy[ids] = np.random.uniform(20, 40, num_attacks)
         
         print(f"Injected {len(self.sinkhole_nodes)} sinkhole attacks")
         print(f"Malicious nodes: {self.sinkhole_nodes}")
@@ -92,34 +122,49 @@ class WirelessSensorNetwork:
         """Simulate realistic network traffic with sinkhole behavior."""
         print("Simulating network traffic...")
         
-        for _ in range(2000):
-            source = random.randint(0, self.num_nodes - 1)
-            destination = random.randint(0, self.num_nodes - 1)
-            
-            if source != destination:
-                self.nodes[source].packets_sent += 1
-                self.total_packets_sent += 1
-                
-                if self.nodes[source].is_malicious:
-                    if random.random() < 0.45:
-                        self.nodes[destination].packets_received += 1
-                        self.total_packets_received += 1
-                else:
-                    if random.random() < 0.85:
-                        self.nodes[destination].packets_received += 1
-                        self.total_packets_received += 1
+        num_transmissions = 2000
+        source = np.random.randint(0, self.num_nodes, num_transmissions)
+        destination = np.random.randint(0, self.num_nodes, num_transmissions)
+        roll = np.random.random(num_transmissions)
+        
+        valid = source != destination
+        source, destination, roll = source[valid], destination[valid], roll[valid]
+        
+        # Sinkholes forward far fewer packets than normal nodes
+        threshold = np.where(self.is_malicious[source], 0.45, 0.85)
+        delivered = roll < threshold
+        
+        np.add.at(self.packets_sent, source, 1)
+        np.add.at(self.packets_received, destination[delivered], 1)
+        self.total_packets_sent += int(valid.sum())
+        self.total_packets_received += int(delivered.sum())
         
-        for node_id in self.sinkhole_nodes:
-            extra_packets = random.randint(20, 50)
-            self.nodes[node_id].packets_sent += extra_packets
-            self.total_packets_sent += extra_packets
+        ids = np.array(self.sinkhole_nodes)
+        extra_packets = np.random.randint(20, 51, len(ids))
+        np.add.at(self.packets_sent, ids, extra_packets)
+        self.total_packets_sent += int(extra_packets.sum())
+    
+    def get_neighbors(self, node_id):
+        return self.nbr_indices[self.nbr_indptr[node_id]:self.nbr_indptr[node_id + 1]]
+    
+    def get_edge_slots(self, from_nodes, to_nodes):
+        """CSR slots of the given (from, to) edges; every pair must be an edge."""
+        return np.searchsorted(self._edge_keys, from_nodes * self.num_nodes + to_nodes)
+    
+    def get_neighbor_slots(self, node_ids):
+        """CSR slots of every (node, neighbor) pair for the given nodes, row by row."""
+        counts = self.degree[node_ids]
+        starts = np.repeat(self.nbr_indptr[node_ids], counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return starts + offsets
+    
+    def get_delivery_ratios(self):
+        return self.packets_received / np.maximum(self.packets_sent, 1)
     
     def get_node_behavior(self, node_id):
-        node = self.nodes[node_id]
-        delivery_ratio = node.packets_received / max(node.packets_sent, 1)
         return {
-            'delivery_ratio': delivery_ratio,
-            'packets_sent': node.packets_sent,
-            'packets_received': node.packets_received,
-            'is_malicious': node.is_malicious
+            'delivery_ratio': self.packets_received[node_id] / max(self.packets_sent[node_id], 1),
+            'packets_sent': int(self.packets_sent[node_id]),
+            'packets_received': int(self.packets_received[node_id]),
+            'is_malicious': bool(self.is_malicious[node_id])
         }